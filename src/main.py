@@ -1,17 +1,30 @@
 """MCP server that connects to the hosted Mem0 Cloud API."""
 
 from mcp.server.fastmcp import FastMCP, Context
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+from contextvars import ContextVar
 from collections.abc import AsyncIterator
 from dataclasses import dataclass
 from dotenv import load_dotenv
+from typing import Final
 import asyncio
-import json
+import orjson
 import logging
 import os
+import sys
+import time
 
 from mem0 import AsyncMemoryClient
-from utils import get_mem0_client, close_mem0_client
+from semantic_cache import SemanticCache, cached_embedder
+from utils import (
+    BatchedAdd,
+    Embedder,
+    get_embedder,
+    get_mem0_client,
+    close_mem0_client,
+    normalize_results,
+    with_retries,
+)
 
 load_dotenv()
 logging.basicConfig(level=logging.INFO)
@@ -19,8 +32,27 @@ logger = logging.getLogger(__name__)
 
 # Default user ID for memory operations. This can be overridden by providing
 # a ``user_id`` argument to the tools or by setting the ``DEFAULT_USER_ID``
-# environment variable.
-DEFAULT_USER_ID = os.getenv("DEFAULT_USER_ID", "user")
+# environment variable. Interned so dict-key comparisons against it hit
+# pointer equality.
+DEFAULT_USER_ID = sys.intern(os.getenv("DEFAULT_USER_ID", "user"))
+
+# Server configuration, read once at import instead of per startup call.
+TRANSPORT = os.getenv("TRANSPORT", "sse")
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = os.getenv("PORT", "8050")
+
+# Semantic cache capacity. The default (4096) sits above the ANN threshold
+# so a warm cache switches to the HNSW index when hnswlib is installed.
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "4096"))
+
+# orjson serializes straight to bytes in C; tools decode once at the end.
+_JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+# Response strings reused on every call, hoisted off the tool hot paths.
+_UNAVAILABLE: Final = (
+    "Error: Memory service is currently unavailable. Please try again later."
+)
+_SAVED_PREFIX: Final = "Successfully saved memory: "
 
 def get_mem0_client_safe() -> AsyncMemoryClient | None:
     """Create a Mem0 client if possible, returning ``None`` on failure."""
@@ -35,6 +67,16 @@ def get_mem0_client_safe() -> AsyncMemoryClient | None:
 class Mem0Context:
     """Context for the Mem0 MCP server."""
     memory_client: AsyncMemoryClient | None
+    search_cache: SemanticCache
+    embedder: Embedder | None
+    batcher: BatchedAdd | None
+
+# The application context, set once per lifespan. Reading a ContextVar is
+# a single C-level lookup, versus the four-attribute
+# ctx.request_context.lifespan_context chain on every tool call.
+_APP_CONTEXT: ContextVar[Mem0Context | None] = ContextVar(
+    "_APP_CONTEXT", default=None
+)
 
 @asynccontextmanager
 async def mem0_lifespan(server: FastMCP) -> AsyncIterator[Mem0Context]:
@@ -50,9 +92,39 @@ async def mem0_lifespan(server: FastMCP) -> AsyncIterator[Mem0Context]:
     # Create a single Mem0 client lazily with graceful failure handling
     memory_client = get_mem0_client_safe()
 
+    # Warm the connection pool so the first tool call doesn't pay DNS +
+    # TCP + TLS setup. Best effort only; failures fall through to lazy
+    # connection on first use.
+    if memory_client is not None:
+        http_client = getattr(memory_client, "async_client", None)
+        if http_client is not None:
+            with suppress(Exception):
+                await http_client.get("/v1/ping/", timeout=2.0)
+
+    # The semantic cache is inert without an embedder; get_embedder returns
+    # None when no embedding backend is configured.
+    search_cache = SemanticCache(max_size=SEMANTIC_CACHE_SIZE)
+    embedder = get_embedder()
+    if embedder is not None:
+        # Exact repeats of a query skip the embedding call as well.
+        embedder = cached_embedder(embedder)
+
+    # Concurrent save_memory calls are coalesced into batch writes.
+    batcher = BatchedAdd(memory_client) if memory_client is not None else None
+
+    app_context = Mem0Context(
+        memory_client=memory_client,
+        search_cache=search_cache,
+        embedder=embedder,
+        batcher=batcher,
+    )
+    token = _APP_CONTEXT.set(app_context)
     try:
-        yield Mem0Context(memory_client=memory_client)
+        yield app_context
     finally:
+        _APP_CONTEXT.reset(token)
+        if batcher is not None:
+            await batcher.aclose()
         if memory_client is not None:
             await close_mem0_client(memory_client)
 
@@ -61,10 +133,129 @@ mcp = FastMCP(
     "mcp-mem0",
     description="MCP server for long term memory storage and retrieval with Mem0",
     lifespan=mem0_lifespan,
-    host=os.getenv("HOST", "0.0.0.0"),
-    port=os.getenv("PORT", "8050")
+    host=HOST,
+    port=PORT
 )
 
+# In-flight upstream requests keyed by their full argument tuple, so
+# concurrent identical calls share one round trip.
+_inflight: dict[tuple, asyncio.Future] = {}
+
+# Recently served get_all_memories listings, keyed by
+# (user_id, memory_type, limit, offset) with a short TTL. Entries are
+# dropped for a user/category as soon as a memory is saved there, and the
+# dict is capped so one-off users/pages can't accumulate without bound.
+_LIST_CACHE_TTL = 30.0
+_LIST_CACHE_MAX = 256
+_list_cache: dict[tuple[str, str, int, int], tuple[float, str]] = {}
+
+def _cached_listing(key: tuple[str, str, int, int]) -> str | None:
+    """Return a fresh cached listing for ``key``, or ``None``."""
+    entry = _list_cache.get(key)
+    if entry is None:
+        return None
+    expires_at, value = entry
+    if expires_at <= time.monotonic():
+        del _list_cache[key]
+        return None
+    return value
+
+def _store_listing(key: tuple[str, str, int, int], value: str) -> None:
+    """Cache a listing, sweeping expired keys and bounding the dict."""
+    now = time.monotonic()
+    if len(_list_cache) >= _LIST_CACHE_MAX:
+        expired = [k for k, (e, _) in _list_cache.items() if e <= now]
+        for k in expired:
+            del _list_cache[k]
+        # Still full after the sweep: evict in insertion order, which
+        # approximates oldest-first for a short uniform TTL.
+        while len(_list_cache) >= _LIST_CACHE_MAX:
+            del _list_cache[next(iter(_list_cache))]
+    _list_cache[key] = (now + _LIST_CACHE_TTL, value)
+
+def _invalidate_listings(user_id: str, memory_type: str) -> None:
+    """Drop cached listings for ``(user_id, memory_type)`` across pages."""
+    stale = [
+        key for key in _list_cache
+        if key[0] == user_id and key[1] == memory_type
+    ]
+    for key in stale:
+        del _list_cache[key]
+
+async def _single_flight(key: tuple, supplier) -> str:
+    """Run ``supplier`` once for concurrent callers with the same ``key``.
+
+    The first caller executes ``supplier`` and publishes the result (or
+    exception) on a shared future; callers arriving while it is in flight
+    await that future instead of issuing their own upstream request. If
+    the leading caller is cancelled, followers don't inherit its
+    cancellation — they loop back and claim leadership themselves.
+    """
+    while True:
+        existing = _inflight.get(key)
+        if existing is None:
+            break
+        try:
+            # Shielded so cancelling this follower doesn't cancel the
+            # shared future out from under the leader and its other
+            # followers.
+            return await asyncio.shield(existing)
+        except asyncio.CancelledError:
+            if not existing.cancelled():
+                # The cancellation is our own, not the leader's.
+                raise
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        result = await supplier()
+    except Exception as exc:
+        future.set_exception(exc)
+        # Mark the exception as retrieved in case no other caller joined.
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        if not future.done():
+            # The leading caller was cancelled before resolving the
+            # future; cancel it too so followers are woken instead of
+            # awaiting forever.
+            future.cancel()
+        _inflight.pop(key, None)
+
+def _get_client(ctx: Context) -> tuple[Mem0Context, str | None]:
+    """Resolve the application context and check client availability once.
+
+    Prefers the ``_APP_CONTEXT`` ContextVar (one C-level lookup) over
+    walking the ``ctx.request_context.lifespan_context`` attribute chain;
+    the chain is kept as a fallback because ContextVars set in a lifespan
+    task aren't guaranteed to propagate to request tasks on every server
+    stack. Returns ``(app_context, error)``, where ``error`` is the
+    user-facing message when the memory service is unavailable.
+    """
+    app_context = _APP_CONTEXT.get()
+    if app_context is None:
+        app_context = ctx.request_context.lifespan_context
+    if app_context.memory_client is None:
+        return app_context, _UNAVAILABLE
+    return app_context, None
+
+async def _embed_query(app_context: Mem0Context, query: str) -> list[float] | None:
+    """Embed ``query`` for cache lookups, returning ``None`` on any failure.
+
+    Embedding failures must never break the search path, so errors are
+    logged and the caller falls through to a regular Mem0 search.
+    """
+    if app_context.embedder is None:
+        return None
+    try:
+        return await app_context.embedder(query)
+    except Exception as exc:
+        logger.warning("Failed to embed query for cache lookup: %s", exc)
+        return None
+
 @mcp.tool(description="Store information for future reference in Mem0")
 async def save_memory(
     ctx: Context,
@@ -88,9 +279,9 @@ async def save_memory(
         date: The date the message was sent
     """
     try:
-        mem0_client = ctx.request_context.lifespan_context.memory_client
-        if mem0_client is None:
-            return "Error: Memory service is currently unavailable. Please try again later."
+        app_context, error = _get_client(ctx)
+        if error is not None:
+            return error
 
         metadata = {
             "id": user_id,
@@ -100,58 +291,80 @@ async def save_memory(
 
         messages = [{"role": "user", "content": text}]
 
-        await mem0_client.add(
+        await app_context.batcher.submit(
             messages,
             user_id=user_id,
             category=memory_type,
             metadata=metadata,
         )
-        return (
-            f"Successfully saved memory: {text[:100]}..."
-            if len(text) > 100
-            else f"Successfully saved memory: {text}"
-        )
+        # Cached search results and listings for this user/category are
+        # now stale.
+        app_context.search_cache.invalidate(user_id, memory_type)
+        _invalidate_listings(user_id, memory_type)
+        preview = text if len(text) <= 100 else text[:100] + "..."
+        return f"{_SAVED_PREFIX}{preview}"
     except Exception as e:
-        logger.exception("Error saving memory")
-        return f"Error saving memory: {str(e)}"
+        if logger.isEnabledFor(logging.ERROR):
+            logger.error("save_memory failed: %s", e, exc_info=e)
+        return "Error saving memory"
 
 @mcp.tool(description="Retrieve all memories stored for a user")
 async def get_all_memories(
     ctx: Context,
     memory_type: str = "memory",
     user_id: str = DEFAULT_USER_ID,
+    limit: int = 50,
+    offset: int = 0,
 ) -> str:
     """Get all stored memories for the user.
-    
+
     Call this tool when you need complete context of all previously memories.
 
     Args:
         ctx: The MCP server provided context which includes the Mem0 client
         memory_type: Either "memory" or "note" to select the category
         user_id: Identifier for the user whose memories should be returned
+        limit: Maximum number of memories to return per page (default: 50)
+        offset: Number of memories to skip before the returned page
 
-    Returns a JSON formatted list of all stored memories, including when they were created
-    and their content. Results are paginated with a default of 50 items per page.
+    Returns a JSON formatted list of stored memories, including when they were
+    created and their content. The full listing is fetched and paginated
+    here with a default of 50 items per page.
     """
     try:
-        mem0_client = ctx.request_context.lifespan_context.memory_client
-        if mem0_client is None:
-            return "Error: Memory service is currently unavailable. Please try again later."
-        memories = await mem0_client.get_all(user_id=user_id, category=memory_type)
-        if isinstance(memories, dict) and "results" in memories:
-            formatted = []
-            for memory in memories["results"]:
-                entry = {
-                    "memory": memory.get("memory"),
-                    "metadata": memory.get("metadata"),
-                }
-                formatted.append(entry)
-        else:
-            formatted = memories
-        return json.dumps(formatted, indent=2)
+        app_context, error = _get_client(ctx)
+        if error is not None:
+            return error
+        mem0_client = app_context.memory_client
+
+        cache_key = (user_id, memory_type, limit, offset)
+        cached = _cached_listing(cache_key)
+        if cached is not None:
+            return cached
+
+        async def fetch() -> str:
+            memories = await with_retries(
+                mem0_client.get_all, user_id=user_id, category=memory_type
+            )
+            # The documented v1 list endpoint takes no pagination
+            # parameters (mem0ai forwards unknown kwargs as query params
+            # rather than rejecting them), so slice the listing here.
+            page = normalize_results(memories)[offset:offset + limit]
+            formatted = [
+                {"memory": m.get("memory"), "metadata": m.get("metadata")}
+                for m in page
+            ]
+            result = orjson.dumps(formatted, option=_JSON_OPTIONS).decode()
+            _store_listing(cache_key, result)
+            return result
+
+        return await _single_flight(
+            ("get_all", user_id, memory_type, limit, offset), fetch
+        )
     except Exception as e:
-        logger.exception("Error retrieving memories")
-        return f"Error retrieving memories: {str(e)}"
+        if logger.isEnabledFor(logging.ERROR):
+            logger.error("get_all_memories failed: %s", e, exc_info=e)
+        return "Error retrieving memories"
 
 @mcp.tool(description="Search stored memories for relevant information")
 async def search_memories(
@@ -174,33 +387,80 @@ async def search_memories(
         user_id: Identifier for the user whose memories should be searched
     """
     try:
-        mem0_client = ctx.request_context.lifespan_context.memory_client
-        if mem0_client is None:
-            return "Error: Memory service is currently unavailable. Please try again later."
-        memories = await mem0_client.search(
-            query,
-            user_id=user_id,
-            category=memory_type,
-            limit=limit,
+        app_context, error = _get_client(ctx)
+        if error is not None:
+            return error
+        mem0_client = app_context.memory_client
+
+        # Semantically equivalent queries can be served straight from the
+        # cache, skipping the Mem0 round trip entirely.
+        cache_scope = (user_id, memory_type, limit)
+        embedding = await _embed_query(app_context, query)
+        if embedding is not None:
+            cached = app_context.search_cache.get(cache_scope, embedding)
+            if cached is not None:
+                return cached
+
+        async def fetch() -> str:
+            memories = await with_retries(
+                mem0_client.search,
+                query,
+                user_id=user_id,
+                category=memory_type,
+                limit=limit,
+            )
+            formatted = [
+                {"memory": m.get("memory"), "metadata": m.get("metadata")}
+                for m in normalize_results(memories)
+            ]
+            result = orjson.dumps(formatted, option=_JSON_OPTIONS).decode()
+            if embedding is not None:
+                app_context.search_cache.put(cache_scope, embedding, result)
+            return result
+
+        return await _single_flight(
+            ("search", user_id, memory_type, query, limit), fetch
         )
-        if isinstance(memories, dict) and "results" in memories:
-            formatted = []
-            for memory in memories["results"]:
-                entry = {
-                    "memory": memory.get("memory"),
-                    "metadata": memory.get("metadata"),
-                }
-                formatted.append(entry)
-        else:
-            formatted = memories
-        return json.dumps(formatted, indent=2)
     except Exception as e:
-        logger.exception("Error searching memories")
-        return f"Error searching memories: {str(e)}"
+        if logger.isEnabledFor(logging.ERROR):
+            logger.error("search_memories failed: %s", e, exc_info=e)
+        return "Error searching memories"
+
+@mcp.tool(description="Report cache statistics for the memory server")
+async def cache_stats(ctx: Context) -> str:
+    """Get hit/miss counters for the semantic search cache.
+
+    Args:
+        ctx: The MCP server provided context which includes the Mem0 client
+    """
+    try:
+        app_context = _APP_CONTEXT.get() or ctx.request_context.lifespan_context
+        return orjson.dumps(
+            app_context.search_cache.stats(), option=_JSON_OPTIONS
+        ).decode()
+    except Exception as e:
+        if logger.isEnabledFor(logging.ERROR):
+            logger.error("cache_stats failed: %s", e, exc_info=e)
+        return "Error reading cache stats"
+
+def _install_uvloop() -> None:
+    """Use uvloop as the event loop where available.
+
+    uvloop's libuv-based selectors roughly double throughput for an SSE
+    server handling many concurrent tool calls. It doesn't support
+    Windows and is an optional dependency, so fall back silently to the
+    default loop.
+    """
+    if sys.platform == "win32":
+        return
+    try:
+        import uvloop
+    except ImportError:
+        return
+    uvloop.install()
 
 async def main():
-    transport = os.getenv("TRANSPORT", "sse")
-    if transport == 'sse':
+    if TRANSPORT == 'sse':
         # Run the MCP server with sse transport
         await mcp.run_sse_async()
     else:
@@ -208,4 +468,5 @@ async def main():
         await mcp.run_stdio_async()
 
 if __name__ == "__main__":
+    _install_uvloop()
     asyncio.run(main())
@@ -0,0 +1,283 @@
+"""In-process LRU semantic cache for Mem0 search results.
+
+Caches ``search_memories`` responses keyed by the embedding of the query so
+that repeated or paraphrased queries can be served without a Mem0 round trip.
+Entries are scoped by ``(user_id, memory_type, limit)`` so results are never
+shared across users or categories. Embeddings are L2-normalized and
+int8-quantized once at insert time, which reduces cosine similarity to a
+single integer dot product against a contiguous ``(N, d)`` matrix at a
+quarter of the FP32 memory bandwidth.
+"""
+
+from collections import OrderedDict
+from contextlib import suppress
+from dataclasses import dataclass, field
+from itertools import count
+import hashlib
+import time
+
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+# Cache sizing and freshness defaults. A week-long TTL is appropriate here
+# because entries are explicitly invalidated whenever a memory is saved for
+# the same user and category. 4096 int8-quantized 1536-d entries cost ~6 MB.
+DEFAULT_MAX_SIZE = 4096
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_SIMILARITY_THRESHOLD = 0.92
+
+# Above this many entries, the brute-force scan becomes the bottleneck and
+# lookups switch to an HNSW index (when hnswlib is installed). Must be
+# below max_size or the index never engages.
+DEFAULT_ANN_THRESHOLD = 1024
+_ANN_MAX_ELEMENTS = 65536
+# Nearest neighbours fetched per ANN lookup; candidates from other scopes
+# are filtered out afterwards.
+_ANN_CANDIDATES = 16
+
+# Exact-match embedding cache sizing: 2048 x 1536-d FP32 vectors stays
+# under 16 MB.
+DEFAULT_EMBEDDING_CACHE_SIZE = 2048
+
+# Scope is (user_id, memory_type, limit).
+Scope = tuple[str, str, int]
+
+
+def cached_embedder(embed, maxsize: int = DEFAULT_EMBEDDING_CACHE_SIZE):
+    """Wrap an async embedding function with an exact-match LRU cache.
+
+    The same query string is frequently re-embedded across retries and
+    refetches, so repeats skip the embedding call entirely. This is the
+    async analogue of ``functools.lru_cache``: entries are keyed by
+    ``sha1(query)`` and stored as raw FP32 bytes to keep them compact.
+    """
+    entries: OrderedDict[bytes, bytes] = OrderedDict()
+
+    async def embed_cached(text: str) -> np.ndarray:
+        key = hashlib.sha1(text.encode()).digest()
+        cached = entries.get(key)
+        if cached is not None:
+            entries.move_to_end(key)
+            return np.frombuffer(cached, dtype=np.float32)
+        embedding = np.asarray(await embed(text), dtype=np.float32)
+        entries[key] = embedding.tobytes()
+        while len(entries) > maxsize:
+            entries.popitem(last=False)
+        return embedding
+
+    return embed_cached
+
+
+def normalize_embedding(embedding) -> np.ndarray:
+    """Return ``embedding`` as a unit-norm contiguous float32 vector."""
+    vector = np.ascontiguousarray(embedding, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(vector))
+    if norm > 0.0:
+        vector = vector / norm
+    return vector
+
+
+def quantize_embedding(embedding) -> tuple[np.ndarray, float]:
+    """Quantize a vector to int8 with a symmetric per-vector scale.
+
+    Storing int8 instead of FP32 cuts the bandwidth of the similarity
+    scan 4x; the dot product of two quantized vectors multiplied by both
+    scales approximates the FP32 result closely enough for a 0.92
+    threshold. Returns ``(quantized, scale)``.
+    """
+    vector = normalize_embedding(embedding)
+    scale = float(np.abs(vector).max()) / 127.0
+    if scale == 0.0:
+        return vector.astype(np.int8), 0.0
+    quantized = np.round(vector / scale).astype(np.int8)
+    return quantized, scale
+
+
+@dataclass
+class _Entry:
+    """A single cached query/result pair."""
+    scope: Scope
+    embedding: np.ndarray  # int8-quantized, unit norm before quantization
+    scale: float
+    value: str
+    expires_at: float = field(default=0.0)
+
+
+class SemanticCache:
+    """Fixed-size LRU cache mapping query embeddings to result JSON.
+
+    Lookups scan only the entries belonging to the requested scope and
+    return the cached value for the most similar stored query when its
+    cosine similarity meets the threshold. Small caches use a brute-force
+    scan; once the cache outgrows ``ann_threshold`` (and hnswlib is
+    installed), lookups go through an HNSW index, which skips the vast
+    majority of distance computations.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        ann_threshold: int = DEFAULT_ANN_THRESHOLD,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.ann_threshold = ann_threshold
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[int, _Entry] = OrderedDict()
+        self._labels = count()
+        self._index = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, scope: Scope, embedding) -> str | None:
+        """Return the cached value for the closest query in ``scope``.
+
+        Returns ``None`` on a miss (no entry within the similarity
+        threshold, or all candidates expired).
+        """
+        self._purge_expired()
+        if self._index is not None:
+            return self._get_ann(scope, embedding)
+        candidates = [
+            (label, entry)
+            for label, entry in self._entries.items()
+            if entry.scope == scope
+        ]
+        if not candidates:
+            self.misses += 1
+            return None
+
+        query, query_scale = quantize_embedding(embedding)
+        # Stack candidate embeddings into one contiguous int8 (N, d)
+        # matrix so the scan is a single matrix-vector product over a
+        # quarter of the FP32 bandwidth. Accumulate in int32 (an int8
+        # accumulator would overflow immediately), then rescale.
+        matrix = np.stack([entry.embedding for _, entry in candidates])
+        scales = np.array(
+            [entry.scale for _, entry in candidates], dtype=np.float32
+        )
+        dots = np.einsum("d,nd->n", query, matrix, dtype=np.int32)
+        similarities = dots.astype(np.float32) * query_scale * scales
+        best = int(np.argmax(similarities))
+        if float(similarities[best]) < self.similarity_threshold:
+            self.misses += 1
+            return None
+
+        label, entry = candidates[best]
+        self._entries.move_to_end(label)
+        self.hits += 1
+        return entry.value
+
+    def put(self, scope: Scope, embedding, value: str) -> None:
+        """Insert a query/result pair, evicting the LRU entry if full."""
+        quantized, scale = quantize_embedding(embedding)
+        entry = _Entry(
+            scope=scope,
+            embedding=quantized,
+            scale=scale,
+            value=value,
+            expires_at=time.monotonic() + self.ttl_seconds,
+        )
+        label = next(self._labels)
+        self._entries[label] = entry
+        if self._index is not None:
+            self._index_add(label, entry)
+        elif hnswlib is not None and len(self._entries) > self.ann_threshold:
+            self._build_index()
+        while len(self._entries) > self.max_size:
+            evicted, _ = self._entries.popitem(last=False)
+            self._index_remove(evicted)
+
+    def invalidate(self, user_id: str, memory_type: str) -> None:
+        """Drop all entries for ``(user_id, memory_type)`` across limits."""
+        stale = [
+            label
+            for label, entry in self._entries.items()
+            if entry.scope[0] == user_id and entry.scope[1] == memory_type
+        ]
+        for label in stale:
+            del self._entries[label]
+            self._index_remove(label)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the current cache size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+        }
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        expired = [
+            label
+            for label, entry in self._entries.items()
+            if entry.expires_at <= now
+        ]
+        for label in expired:
+            del self._entries[label]
+            self._index_remove(label)
+
+    # -- HNSW index management -------------------------------------------
+
+    def _get_ann(self, scope: Scope, embedding) -> str | None:
+        """ANN lookup: query the HNSW index and filter by scope."""
+        query = normalize_embedding(embedding)
+        k = min(_ANN_CANDIDATES, len(self._entries))
+        try:
+            labels, distances = self._index.knn_query(
+                query.reshape(1, -1), k=k
+            )
+        except Exception:
+            # The index can transiently hold fewer live elements than k;
+            # fall back to a miss rather than failing the search path.
+            self.misses += 1
+            return None
+
+        for label, distance in zip(labels[0], distances[0]):
+            if 1.0 - float(distance) < self.similarity_threshold:
+                break
+            entry = self._entries.get(int(label))
+            if entry is None or entry.scope != scope:
+                continue
+            self._entries.move_to_end(int(label))
+            self.hits += 1
+            return entry.value
+        self.misses += 1
+        return None
+
+    def _build_index(self) -> None:
+        first = next(iter(self._entries.values()))
+        index = hnswlib.Index(space="cosine", dim=int(first.embedding.size))
+        index.init_index(
+            max_elements=_ANN_MAX_ELEMENTS, ef_construction=200, M=16
+        )
+        index.set_ef(64)
+        self._index = index
+        for label, entry in self._entries.items():
+            self._index_add(label, entry)
+
+    def _index_add(self, label: int, entry: _Entry) -> None:
+        # The index wants float vectors; dequantizing loses nothing the
+        # 0.92 threshold would notice.
+        vector = entry.embedding.astype(np.float32) * entry.scale
+        try:
+            self._index.add_items(vector.reshape(1, -1), [label])
+        except Exception:
+            # Label space exhausted; rebuild compactly from live entries.
+            self._build_index()
+
+    def _index_remove(self, label: int) -> None:
+        if self._index is not None:
+            with suppress(Exception):
+                self._index.mark_deleted(label)
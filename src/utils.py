@@ -1,12 +1,102 @@
 """Utility functions for working with the Mem0 Cloud API."""
 
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
 from mem0 import AsyncMemoryClient
+import asyncio
+import atexit
+import httpx
+import orjson
 import os
 import logging
+import random
+import uuid
+import weakref
 
 
 logger = logging.getLogger(__name__)
 
+# Embedding model used for the semantic search cache. Kept small and cheap;
+# cache lookups only need rough semantic equivalence, not retrieval quality.
+DEFAULT_EMBEDDING_MODEL = "text-embedding-3-small"
+
+Embedder = Callable[[str], Awaitable[list[float]]]
+
+
+# One HTTP/2 transport shared by every client built in this process, so
+# lifespan restarts and multiple client configurations reuse the same TLS
+# connections instead of reconnecting. Closed once at interpreter exit.
+_TRANSPORT = httpx.AsyncHTTPTransport(
+    http2=True,
+    retries=2,
+    limits=httpx.Limits(
+        max_keepalive_connections=32,
+        max_connections=64,
+        keepalive_expiry=300,
+    ),
+)
+
+# httpx.AsyncClient.aclose() closes its transport, shared or not, so
+# clients riding on _TRANSPORT are tracked and skipped during per-client
+# shutdown; the transport outlives them and is closed by atexit below.
+_shared_transport_clients: weakref.WeakSet = weakref.WeakSet()
+
+
+def _close_shared_transport() -> None:
+    with suppress(Exception):
+        asyncio.run(_TRANSPORT.aclose())
+
+
+atexit.register(_close_shared_transport)
+
+
+def _configure_http_transport(client: AsyncMemoryClient) -> None:
+    """Swap the client's default HTTP/1.1 pool for a multiplexed HTTP/2 one.
+
+    The stock :class:`httpx.AsyncClient` created by ``mem0ai`` uses HTTP/1.1
+    with a small pool, so concurrent tool calls queue behind head-of-line
+    blocking and pay extra round trips. Rebuild it with HTTP/2, an
+    explicitly sized keep-alive pool, and transport-level connect retries so
+    DNS/TCP/TLS setup is paid once per connection. Like ``base_url``
+    handling in :func:`get_mem0_client`, this degrades gracefully on
+    ``mem0ai`` versions whose internals differ.
+    """
+    http_client = getattr(client, "async_client", None)
+    if not isinstance(http_client, httpx.AsyncClient):
+        logger.warning(
+            "AsyncMemoryClient has no httpx.AsyncClient to reconfigure; "
+            "keeping the default transport"
+        )
+        return
+
+    # Carry over the default headers unchanged: httpx already advertises
+    # exactly the content codings it can decode (gzip/deflate), and
+    # brotli is not a dependency, so overriding accept-encoding would
+    # either duplicate the header or promise a coding we can't decode.
+    client.async_client = httpx.AsyncClient(
+        base_url=http_client.base_url,
+        headers=http_client.headers,
+        timeout=httpx.Timeout(connect=2, read=30, write=10, pool=5),
+        transport=_TRANSPORT,
+    )
+    _shared_transport_clients.add(client.async_client)
+
+    # Close the replaced default client rather than dropping it unclosed.
+    # It has never sent a request, so this only releases its idle pool.
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        with suppress(Exception):
+            asyncio.run(http_client.aclose())
+    else:
+        loop.create_task(http_client.aclose())
+
+
+# Clients memoized per configuration, so repeated lifespan constructions
+# (server reloads, multiple mounts in one process) share one client and
+# its connection pool instead of opening a fresh one each time.
+_client_cache: dict[tuple[str, str | None], AsyncMemoryClient] = {}
+
 
 def get_mem0_client() -> AsyncMemoryClient:
     """Instantiate an async Mem0 Cloud client from environment variables.
@@ -15,7 +105,8 @@ def get_mem0_client() -> AsyncMemoryClient:
     versions of :class:`~mem0.AsyncMemoryClient` do not accept a ``base_url``
     parameter, so we attempt to provide it only if supported. If passing the
     parameter fails, we fall back to instantiating the client with only the API
-    key.
+    key. Clients are cached per ``(api_key, base_url)`` and evicted again by
+    :func:`close_mem0_client`.
     """
 
     api_key = os.getenv("MEM0_API_KEY")
@@ -23,19 +114,276 @@ def get_mem0_client() -> AsyncMemoryClient:
         raise ValueError("MEM0_API_KEY environment variable is required")
     base_url = os.getenv("MEM0_BASE_URL")
 
+    cached = _client_cache.get((api_key, base_url))
+    if cached is not None:
+        return cached
+
+    client = None
     if base_url:
         try:
-            return AsyncMemoryClient(api_key=api_key, base_url=base_url)
+            client = AsyncMemoryClient(api_key=api_key, base_url=base_url)
         except TypeError as exc:
             logger.warning(
                 "AsyncMemoryClient does not accept 'base_url': %s; "
                 "falling back to default", exc
             )
 
-    return AsyncMemoryClient(api_key=api_key)
+    if client is None:
+        client = AsyncMemoryClient(api_key=api_key)
+
+    _configure_http_transport(client)
+    _client_cache[(api_key, base_url)] = client
+    return client
+
+
+def normalize_results(data) -> list[dict]:
+    """Unwrap a Mem0 response into a plain list of memory records.
+
+    Depending on the API version, responses arrive either as a bare list or
+    wrapped in ``{"results": [...]}``. Normalizing here keeps the tools'
+    formatting paths branch-free. Ideally this would live inside the client,
+    but that belongs to the ``mem0ai`` package.
+    """
+    if isinstance(data, dict) and "results" in data:
+        return data["results"]
+    return data
+
+
+# HTTP statuses worth retrying: rate limiting and transient upstream errors.
+RETRYABLE_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+
+async def with_retries(func, *args, tries: int = 3, base: float = 0.1,
+                       cap: float = 1.0, **kwargs):
+    """Call ``func`` with exponential backoff and full jitter.
+
+    Retries transport errors, timeouts, and retryable HTTP statuses
+    (429/502/503/504) so a transient Mem0 Cloud hiccup doesn't burn the
+    whole MCP tool call. Sleeps ``uniform(0, min(cap, base * 2**attempt))``
+    between attempts and re-raises after the last one.
+    """
+    for attempt in range(tries):
+        try:
+            return await func(*args, **kwargs)
+        except httpx.HTTPStatusError as exc:
+            if (exc.response.status_code not in RETRYABLE_STATUS_CODES
+                    or attempt == tries - 1):
+                raise
+            logger.warning(
+                "Retrying after HTTP %s (attempt %d/%d)",
+                exc.response.status_code, attempt + 1, tries,
+            )
+        except httpx.TransportError as exc:
+            if attempt == tries - 1:
+                raise
+            logger.warning(
+                "Retrying after transport error: %s (attempt %d/%d)",
+                exc, attempt + 1, tries,
+            )
+        await asyncio.sleep(random.uniform(0, min(cap, base * 2 ** attempt)))
+
+
+class BatchedAdd:
+    """Coalesces concurrent memory writes into a single Mem0 batch request.
+
+    Calls arriving within a small time window are drained together and sent
+    as one ``/v1/memories/batch/`` POST, amortizing connection and request
+    overhead under concurrent MCP load. Each caller receives its own
+    per-item result through an :class:`asyncio.Future`. If the server does
+    not support the batch endpoint (404/405/400/501), the batcher
+    permanently falls back to issuing per-item ``add`` calls, still
+    coalesced into one drain pass.
+    """
+
+    BATCH_PATH = "/v1/memories/batch/"
+
+    # Statuses that mean the server doesn't speak the batch endpoint at
+    # all (missing route, wrong method, malformed shape, unimplemented) —
+    # distinct from a transient failure of an understood request.
+    BATCH_UNSUPPORTED_STATUSES = frozenset({400, 404, 405, 501})
+
+    def __init__(
+        self,
+        client: AsyncMemoryClient,
+        max_latency: float = 0.01,
+        max_batch_size: int = 32,
+    ):
+        self._client = client
+        self._max_latency = max_latency
+        self._max_batch_size = max_batch_size
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self._batch_supported = True
+
+    async def submit(self, messages: list[dict], **kwargs):
+        """Enqueue one ``add`` call and wait for its individual result."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._drain())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((messages, kwargs, future))
+        return await future
+
+    async def aclose(self) -> None:
+        """Stop the drain task, resolving every outstanding submission.
+
+        The batch collected at cancellation time is flushed to the server;
+        submissions still sitting in the queue receive a CancelledError so
+        no caller is left awaiting an unresolved future.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._cancel_queued()
+
+    def _cancel_queued(self) -> None:
+        while not self._queue.empty():
+            _, _, future = self._queue.get_nowait()
+            if not future.done():
+                future.cancel()
+
+    async def _drain(self) -> None:
+        batch: list[tuple] = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = (
+                    asyncio.get_running_loop().time() + self._max_latency
+                )
+                while len(batch) < self._max_batch_size:
+                    remaining = deadline - asyncio.get_running_loop().time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(
+                            await asyncio.wait_for(self._queue.get(), remaining)
+                        )
+                    except asyncio.TimeoutError:
+                        break
+                # Hand the batch off before dispatching so a cancellation
+                # arriving mid-dispatch can't flush the same batch twice,
+                # and shield the dispatch so collected submissions still
+                # reach the server during shutdown.
+                pending, batch = batch, []
+                await asyncio.shield(self._dispatch(pending))
+        except asyncio.CancelledError:
+            if batch:
+                await asyncio.shield(self._dispatch(batch))
+            self._cancel_queued()
+            raise
+
+    async def _dispatch(self, batch: list[tuple]) -> None:
+        if self._batch_supported and len(batch) > 1:
+            if await self._dispatch_batched(batch):
+                return
+        await self._dispatch_individually(batch)
+
+    async def _dispatch_batched(self, batch: list[tuple]) -> bool:
+        """POST the whole batch in one request; ``False`` if unsupported."""
+        http_client = getattr(self._client, "async_client", None)
+        if http_client is None:
+            self._batch_supported = False
+            return False
+
+        items = [
+            # An idempotency key per item keeps retries from double-writing.
+            {"messages": messages, "idempotency_key": uuid.uuid4().hex, **kwargs}
+            for messages, kwargs, _ in batch
+        ]
+        # Items (and their idempotency keys) are built once, outside the
+        # retry loop, so a retried POST cannot double-write.
+        async def post_batch() -> httpx.Response:
+            response = await http_client.post(
+                self.BATCH_PATH, json={"items": items}
+            )
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                response.raise_for_status()
+            return response
+
+        try:
+            response = await with_retries(post_batch)
+            if response.status_code in self.BATCH_UNSUPPORTED_STATUSES:
+                logger.info(
+                    "Mem0 batch endpoint not available (HTTP %s); "
+                    "falling back to per-item adds", response.status_code
+                )
+                self._batch_supported = False
+                return False
+            response.raise_for_status()
+            # orjson parses the raw bytes faster than httpx's stdlib path.
+            results = orjson.loads(response.content).get("results", [])
+        except Exception as exc:
+            logger.warning("Batched memory add failed: %s", exc)
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return True
+
+        for index, (_, _, future) in enumerate(batch):
+            if not future.done():
+                result = results[index] if index < len(results) else None
+                future.set_result(result)
+        return True
+
+    async def _dispatch_individually(self, batch: list[tuple]) -> None:
+        async def add_one(messages, kwargs, future):
+            try:
+                result = await with_retries(self._client.add, messages, **kwargs)
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+        await asyncio.gather(
+            *(add_one(messages, kwargs, future)
+              for messages, kwargs, future in batch)
+        )
+
+
+def get_embedder() -> Embedder | None:
+    """Build an async embedding function for the semantic search cache.
+
+    Uses the OpenAI embeddings API with a small model. Returns ``None`` when
+    no ``OPENAI_API_KEY`` is configured or the ``openai`` package is not
+    installed, in which case callers should simply skip semantic caching.
+    """
+
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return None
+
+    try:
+        from openai import AsyncOpenAI
+    except ImportError:
+        logger.warning(
+            "The 'openai' package is not installed; "
+            "semantic search caching is disabled"
+        )
+        return None
+
+    client = AsyncOpenAI(api_key=api_key)
+    model = os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+
+    async def embed(text: str) -> list[float]:
+        response = await client.embeddings.create(model=model, input=text)
+        return response.data[0].embedding
+
+    return embed
 
 
 async def close_mem0_client(client: AsyncMemoryClient) -> None:
     """Close the HTTP client used by :class:`AsyncMemoryClient`."""
     if client is not None:
+        for key, cached in list(_client_cache.items()):
+            if cached is client:
+                del _client_cache[key]
+        if getattr(client, "async_client", None) in _shared_transport_clients:
+            # Closing this client would also close the shared transport;
+            # leave it for the atexit hook instead.
+            return
         await client.aclose()